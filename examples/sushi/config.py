@@ -1,9 +1,11 @@
+from __future__ import annotations
+
 import os
+import typing as t
 
 from sqlmesh.core.config.common import VirtualEnvironmentMode, TableNamingConvention
 from sqlmesh.core.config import (
     AutoCategorizationMode,
-    BigQueryConnectionConfig,
     CategorizerConfig,
     Config,
     DuckDBConnectionConfig,
@@ -13,20 +15,27 @@ from sqlmesh.core.config import (
     PlanConfig,
 )
 from sqlmesh.core.config.linter import LinterConfig
-from sqlmesh.core.notification_target import (
-    BasicSMTPNotificationTarget,
-    SlackApiNotificationTarget,
-    SlackWebhookNotificationTarget,
-)
-from sqlmesh.core.user import User, UserRole
 
 CURRENT_FILE_PATH = os.path.abspath(__file__)
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
 
-defaults = {"dialect": "duckdb"}
-model_defaults = ModelDefaultsConfig(**defaults)
-model_defaults_iceberg = ModelDefaultsConfig(**defaults, storage_format="iceberg")
+model_defaults = ModelDefaultsConfig(dialect="duckdb")
+model_defaults_iceberg = model_defaults.model_copy(update={"storage_format": "iceberg"})
+
+# Shared by the configs that use the default, in-memory DuckDB connection. Connection configs are
+# mutable, so gateways that must not affect each other get their own instance instead.
+_DEFAULT_DUCKDB = DuckDBConnectionConfig()
+
+_LINTER_RULES = (
+    "ambiguousorinvalidcolumn",
+    "invalidselectstarexpansion",
+    "noselectstar",
+    "nomissingaudits",
+    "nomissingowner",
+    "nomissingexternalmodels",
+)
+
 before_all = [
     "CREATE SCHEMA IF NOT EXISTS raw",
     "DROP VIEW IF EXISTS raw.demographics",
@@ -38,7 +47,7 @@ before_all = [
 config = Config(
     gateways={
         "duckdb": GatewayConfig(
-            connection=DuckDBConnectionConfig(),
+            connection=_DEFAULT_DUCKDB,
         ),
         "duckdb_persistent": GatewayConfig(
             connection=DuckDBConnectionConfig(database=f"{DATA_DIR}/duckdb.db"),
@@ -48,155 +57,233 @@ config = Config(
     model_defaults=model_defaults,
     linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),
     before_all=before_all,
 )
 
-bigquery_config = Config(
-    gateways={
-        "bq": GatewayConfig(
-            connection=BigQueryConnectionConfig(),
-            state_connection=DuckDBConnectionConfig(database=f"{DATA_DIR}/bigquery.duckdb"),
-        )
-    },
-    default_gateway="bq",
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
+IN_MEMORY = ":memory:"
+
+CATALOGS = {
+    "in_memory": IN_MEMORY,
+    "other_catalog": IN_MEMORY,
+}
+
+ENVIRONMENT_CATALOGS = {
+    "physical": IN_MEMORY,
+    "prod_catalog": IN_MEMORY,
+    "dev_catalog": IN_MEMORY,
+}
+
+ENVIRONMENT_CATALOG_MAPPING = {
+    "^prod$": "prod_catalog",
+    ".*": "dev_catalog",
+}
+
+
+# The remaining configs are only built on first access (see `__getattr__` below), so loading the
+# default config doesn't pay for constructing every other config, nor for the BigQuery connection
+# and notification targets that only a few of them need.
+
+
+def _bigquery_config() -> Config:
+    from sqlmesh.core.config import BigQueryConnectionConfig
+
+    return Config(
+        gateways={
+            "bq": GatewayConfig(
+                connection=BigQueryConnectionConfig(),
+                state_connection=DuckDBConnectionConfig(database=f"{DATA_DIR}/bigquery.duckdb"),
+            )
+        },
+        default_gateway="bq",
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
+
 
 # A configuration used for SQLMesh tests.
-test_config = Config(
-    gateways={"in_memory": GatewayConfig(connection=DuckDBConnectionConfig())},
-    default_gateway="in_memory",
-    plan=PlanConfig(
-        auto_categorize_changes=CategorizerConfig(
-            sql=AutoCategorizationMode.SEMI, python=AutoCategorizationMode.OFF
-        )
-    ),
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
+def _test_config() -> Config:
+    return Config(
+        gateways={"in_memory": GatewayConfig(connection=_DEFAULT_DUCKDB)},
+        default_gateway="in_memory",
+        plan=PlanConfig(
+            auto_categorize_changes=CategorizerConfig(
+                sql=AutoCategorizationMode.SEMI, python=AutoCategorizationMode.OFF
+            )
+        ),
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
+
 
 # A configuration used for SQLMesh tests with virtual environment mode set to DEV_ONLY.
-test_config_virtual_environment_mode_dev_only = test_config.copy(
-    update={
-        "virtual_environment_mode": VirtualEnvironmentMode.DEV_ONLY,
-        "plan": PlanConfig(
-            auto_categorize_changes=CategorizerConfig.all_full(),
-        ),
-    },
-)
+def _test_config_virtual_environment_mode_dev_only() -> Config:
+    return _get("test_config").copy(
+        update={
+            "virtual_environment_mode": VirtualEnvironmentMode.DEV_ONLY,
+            "plan": PlanConfig(
+                auto_categorize_changes=CategorizerConfig.all_full(),
+            ),
+        },
+    )
+
 
 # A DuckDB config with a physical schema map.
-map_config = Config(
-    default_connection=DuckDBConnectionConfig(),
-    physical_schema_mapping={"^sushi$": "company_internal"},
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
+def _map_config() -> Config:
+    return Config(
+        default_connection=_DEFAULT_DUCKDB,
+        physical_schema_mapping={"^sushi$": "company_internal"},
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
+
 
 # A config representing isolated systems with a gateway per system
-isolated_systems_config = Config(
-    gateways={
-        "dev": GatewayConfig(connection=DuckDBConnectionConfig()),
-        "test": GatewayConfig(connection=DuckDBConnectionConfig()),
-        "prod": GatewayConfig(connection=DuckDBConnectionConfig()),
-    },
-    default_gateway="dev",
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
+def _isolated_systems_config() -> Config:
+    return Config(
+        gateways={
+            "dev": GatewayConfig(connection=DuckDBConnectionConfig()),
+            "test": GatewayConfig(connection=DuckDBConnectionConfig()),
+            "prod": GatewayConfig(connection=DuckDBConnectionConfig()),
+        },
+        default_gateway="dev",
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
+
+
+def _required_approvers_config() -> Config:
+    from sqlmesh.core.notification_target import (
+        BasicSMTPNotificationTarget,
+        SlackApiNotificationTarget,
+        SlackWebhookNotificationTarget,
+    )
+    from sqlmesh.core.user import User, UserRole
 
-required_approvers_config = Config(
-    default_connection=DuckDBConnectionConfig(),
-    users=[
-        User(
-            username="admin",
-            roles=[UserRole.REQUIRED_APPROVER],
-            notification_targets=[
-                SlackApiNotificationTarget(
-                    notify_on=["apply_start", "apply_failure", "apply_end", "audit_failure"],
-                    token=os.getenv("ADMIN_SLACK_API_TOKEN"),
-                    channel="UXXXXXXXXX",  # User's Slack member ID
-                ),
-            ],
+    env = {
+        key: os.environ.get(key)
+        for key in (
+            "ADMIN_SLACK_API_TOKEN",
+            "SLACK_WEBHOOK_URL",
+            "SMTP_HOST",
+            "SMTP_USER",
+            "SMTP_PASSWORD",
         )
-    ],
-    notification_targets=[
-        SlackWebhookNotificationTarget(
-            notify_on=["apply_start", "apply_failure", "run_start"],
-            url=os.getenv("SLACK_WEBHOOK_URL"),
-        ),
-        BasicSMTPNotificationTarget(
-            notify_on=["run_failure"],
-            host=os.getenv("SMTP_HOST"),
-            user=os.getenv("SMTP_USER"),
-            password=os.getenv("SMTP_PASSWORD"),
-            sender="sushi@example.com",
-            recipients=[
-                "team@example.com",
-            ],
-        ),
-    ],
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
+    }
 
+    return Config(
+        default_connection=_DEFAULT_DUCKDB,
+        users=[
+            User(
+                username="admin",
+                roles=[UserRole.REQUIRED_APPROVER],
+                notification_targets=[
+                    SlackApiNotificationTarget(
+                        notify_on=["apply_start", "apply_failure", "apply_end", "audit_failure"],
+                        token=env["ADMIN_SLACK_API_TOKEN"],
+                        channel="UXXXXXXXXX",  # User's Slack member ID
+                    ),
+                ],
+            )
+        ],
+        notification_targets=[
+            SlackWebhookNotificationTarget(
+                notify_on=["apply_start", "apply_failure", "run_start"],
+                url=env["SLACK_WEBHOOK_URL"],
+            ),
+            BasicSMTPNotificationTarget(
+                notify_on=["run_failure"],
+                host=env["SMTP_HOST"],
+                user=env["SMTP_USER"],
+                password=env["SMTP_PASSWORD"],
+                sender="sushi@example.com",
+                recipients=[
+                    "team@example.com",
+                ],
+            ),
+        ],
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
 
-environment_suffix_table_config = Config(
-    default_connection=DuckDBConnectionConfig(),
-    model_defaults=model_defaults,
-    environment_suffix_target=EnvironmentSuffixTarget.TABLE,
-    before_all=before_all,
-)
 
-environment_suffix_catalog_config = environment_suffix_table_config.model_copy(
-    update={
-        "environment_suffix_target": EnvironmentSuffixTarget.CATALOG,
-    },
-)
+def _environment_suffix_table_config() -> Config:
+    return Config(
+        default_connection=_DEFAULT_DUCKDB,
+        model_defaults=model_defaults,
+        environment_suffix_target=EnvironmentSuffixTarget.TABLE,
+        before_all=before_all,
+    )
 
-CATALOGS = {
-    "in_memory": ":memory:",
-    "other_catalog": ":memory:",
+
+def _environment_suffix_catalog_config() -> Config:
+    return Config(
+        default_connection=_DEFAULT_DUCKDB,
+        model_defaults=model_defaults,
+        environment_suffix_target=EnvironmentSuffixTarget.CATALOG,
+        before_all=before_all,
+    )
+
+
+def _local_catalogs() -> Config:
+    return Config(
+        default_connection=DuckDBConnectionConfig(catalogs=CATALOGS),
+        default_test_connection=DuckDBConnectionConfig(catalogs=CATALOGS),
+        model_defaults=model_defaults,
+        before_all=before_all,
+    )
+
+
+def _environment_catalog_mapping_config() -> Config:
+    return Config(
+        default_connection=DuckDBConnectionConfig(catalogs=ENVIRONMENT_CATALOGS),
+        model_defaults=model_defaults,
+        environment_suffix_target=EnvironmentSuffixTarget.TABLE,
+        environment_catalog_mapping=ENVIRONMENT_CATALOG_MAPPING,
+        before_all=before_all,
+    )
+
+
+def _hash_md5_naming_config() -> Config:
+    return config.copy(update={"physical_table_naming_convention": TableNamingConvention.HASH_MD5})
+
+
+def _table_only_naming_config() -> Config:
+    return config.copy(
+        update={"physical_table_naming_convention": TableNamingConvention.TABLE_ONLY}
+    )
+
+
+_BUILDERS: t.Dict[str, t.Callable[[], t.Any]] = {
+    "bigquery_config": _bigquery_config,
+    "test_config": _test_config,
+    "test_config_virtual_environment_mode_dev_only": _test_config_virtual_environment_mode_dev_only,
+    "map_config": _map_config,
+    "isolated_systems_config": _isolated_systems_config,
+    "required_approvers_config": _required_approvers_config,
+    "environment_suffix_table_config": _environment_suffix_table_config,
+    "environment_suffix_catalog_config": _environment_suffix_catalog_config,
+    "local_catalogs": _local_catalogs,
+    "environment_catalog_mapping_config": _environment_catalog_mapping_config,
+    "hash_md5_naming_config": _hash_md5_naming_config,
+    "table_only_naming_config": _table_only_naming_config,
 }
 
-local_catalogs = Config(
-    default_connection=DuckDBConnectionConfig(catalogs=CATALOGS),
-    default_test_connection=DuckDBConnectionConfig(catalogs=CATALOGS),
-    model_defaults=model_defaults,
-    before_all=before_all,
-)
 
-environment_catalog_mapping_config = Config(
-    default_connection=DuckDBConnectionConfig(
-        catalogs={
-            "physical": ":memory:",
-            "prod_catalog": ":memory:",
-            "dev_catalog": ":memory:",
-        }
-    ),
-    model_defaults=model_defaults,
-    environment_suffix_target=EnvironmentSuffixTarget.TABLE,
-    environment_catalog_mapping={
-        "^prod$": "prod_catalog",
-        ".*": "dev_catalog",
-    },
-    before_all=before_all,
-)
+def _get(name: str) -> t.Any:
+    if name not in globals():
+        builder = _BUILDERS.get(name)
+        if builder is None:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        # Memoize the built object so that subsequent lookups are regular module attribute hits.
+        globals()[name] = builder()
+    return globals()[name]
 
-hash_md5_naming_config = config.copy(
-    update={"physical_table_naming_convention": TableNamingConvention.HASH_MD5}
-)
 
-table_only_naming_config = config.copy(
-    update={"physical_table_naming_convention": TableNamingConvention.TABLE_ONLY}
-)
+def __getattr__(name: str) -> t.Any:
+    return _get(name)
+
+
+def __dir__() -> t.List[str]:
+    return sorted({*globals(), *_BUILDERS})
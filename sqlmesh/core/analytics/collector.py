@@ -7,7 +7,11 @@ from functools import cached_property
 from pathlib import Path
 
 from sqlmesh.core import constants as c
-from sqlmesh.core.analytics.dispatcher import AsyncEventDispatcher, EventDispatcher
+from sqlmesh.core.analytics.dispatcher import (
+    AsyncEventDispatcher,
+    EventDispatcher,
+    NoopEventDispatcher,
+)
 from sqlmesh.utils import random_id
 from sqlmesh.utils.date import now_timestamp
 from sqlmesh.utils.hashing import md5
@@ -32,6 +36,11 @@ class AnalyticsCollector:
         self._process_id = random_id()
         self._seq_num = itertools.count()
 
+    @property
+    def is_enabled(self) -> bool:
+        """Whether collected events are dispatched, i.e. analytics have not been disabled."""
+        return not isinstance(self._dispatcher, NoopEventDispatcher)
+
     def on_cicd_command(
         self,
         *,
@@ -389,6 +389,7 @@ class GenericContext(BaseContext, t.Generic[C]):
         self._excluded_requirements: t.Set[str] = set()
         self._engine_adapter: t.Optional[EngineAdapter] = None
         self._linters: t.Dict[str, Linter] = {}
+        self._node_config_cache: t.Dict[Path, Config] = {}
         self._loaded: bool = False
 
         self.path, self.config = t.cast(t.Tuple[Path, C], next(iter(self.configs.items())))
@@ -616,6 +617,7 @@ class GenericContext(BaseContext, t.Generic[C]):
         self._requirements.clear()
         self._excluded_requirements.clear()
         self._linters.clear()
+        self._node_config_cache.clear()
         self._environment_statements = []
 
         for loader, project in zip(self._loaders, loaded_projects):
@@ -1013,7 +1015,10 @@ class GenericContext(BaseContext, t.Generic[C]):
         path = node._path
         if path is None:
             return self.config
-        return self.config_for_path(path)[0]  # type: ignore
+        config = self._node_config_cache.get(path)
+        if config is None:
+            config = self._node_config_cache[path] = self.config_for_path(path)[0]
+        return config
 
     @property
     def models(self) -> MappingProxyType[str, Model]:
@@ -4,14 +4,12 @@ from io import StringIO
 
 import functools
 import logging
+import types
 import typing as t
+import weakref
 from argparse import Namespace, SUPPRESS
-from collections import defaultdict
-from copy import deepcopy
 from pathlib import Path
 
-from hyperscript import h
-
 if t.TYPE_CHECKING:
     import pandas as pd
 
@@ -27,10 +25,12 @@ from IPython.core.magic import (
     line_magic,
     magics_class,
 )
-from IPython.core.magic_arguments import argument, magic_arguments, parse_argstring
+from IPython.core.magic_arguments import (
+    MagicArgumentParser,
+    argument,
+    magic_arguments,
+)
 from IPython.utils.process import arg_split
-from rich.jupyter import JupyterRenderable
-from sqlmesh.cli.project_init import ProjectTemplate, init_example_project
 from sqlmesh.core import analytics
 from sqlmesh.core.config import load_configs
 from sqlmesh.core.config.connection import INIT_DISPLAY_INFO_TO_TYPE
@@ -50,6 +50,72 @@ CONTEXT_VARIABLE_NAMES = [
     "sqlmesh",
 ]
 
+# INIT_DISPLAY_INFO_TO_TYPE is a dict of {engine_type: (display_order, display_name)}
+INIT_ENGINE_DISPLAY_NAMES = ", ".join(
+    info[1] for info in sorted(INIT_DISPLAY_INFO_TO_TYPE.values(), key=lambda x: x[0])
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _parser_for(magics_cls: t.Type[Magics], magic_name: str) -> t.Optional[MagicArgumentParser]:
+    """Returns the argument parser of a magic, which is built once when the magic is decorated."""
+    return getattr(getattr(magics_cls, magic_name, None), "parser", None)
+
+
+@functools.lru_cache(maxsize=None)
+def _snowpark() -> t.Optional[types.ModuleType]:
+    """Returns the Snowpark module if it is installed, only attempting the import once."""
+    return optional_import("snowflake.snowpark")
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_line(parser: MagicArgumentParser, line: str) -> Namespace:
+    # Magics are often run without arguments, in which case there's nothing to tokenize
+    return parser.parse_argstring(line) if line else parser.parse_args([])
+
+
+def _parse_argstring(magic_func: t.Callable, line: str) -> Namespace:
+    """Parses the arguments of a magic, reusing the result of an earlier parse of the same line.
+
+    Notebook cells tend to be re-run with the same arguments, which makes re-parsing them wasted work.
+    """
+    # All blank lines parse the same, so share a single cache entry between them
+    args = _parse_line(magic_func.parser, line if line.strip() else "")  # type: ignore
+    # Copy list values so that callers can't mutate the cached namespace
+    return Namespace(
+        **{
+            name: list(value) if isinstance(value, list) else value
+            for name, value in vars(args).items()
+        }
+    )
+
+
+def _close_connection(connections: t.Dict[t.Any, t.Any], key: t.Any) -> None:
+    connection = connections.pop(key, None)
+    if connection is not None:
+        connection.close()
+
+
+class _NullStream(StringIO):
+    """A text stream that discards everything written to it instead of buffering it."""
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+class _RenderedHTML:
+    """Displays an object using HTML that was already rendered for it."""
+
+    def __init__(self, obj: t.Any, html: str) -> None:
+        self._obj = obj
+        self._html = html
+
+    def _repr_html_(self) -> str:
+        return self._html
+
+    def __repr__(self) -> str:
+        return repr(self._obj)
+
 
 def pass_sqlmesh_context(func: t.Callable) -> t.Callable:
     @functools.wraps(func)
@@ -69,25 +135,33 @@ def pass_sqlmesh_context(func: t.Callable) -> t.Callable:
         context.refresh()
 
         magic_name = func.__name__
-        bound_method = getattr(self, magic_name, None)
-        if bound_method:
-            args_split = arg_split(args[0])
-            parser = bound_method.parser
+        parser = _parser_for(type(self), magic_name)
+        # Collecting the explicitly passed args requires an extra parse, so skip it when the event would be dropped
+        if analytics.collector.is_enabled:
+            command_args: t.Set[str] = set()
 
-            original_parser_actions = deepcopy(parser._actions)
-            original_parser_defaults = parser._defaults
+            # Magics without arguments don't have a parser
+            if parser:
+                args_split = arg_split(args[0])
 
-            # Temporarily supress default values, otherwise any missing arg would be set and affect analytics
-            parser._defaults = {}
-            for action in parser._actions:
-                action.default = SUPPRESS
+                # Only the defaults are mutated below, so snapshotting them is enough to restore the parser
+                original_action_defaults = [(action, action.default) for action in parser._actions]
+                original_parser_defaults = parser._defaults
 
-            parsed_args, _ = parser.parse_known_args(args_split, Namespace())
+                # Temporarily supress default values, otherwise any missing arg would be set and affect analytics
+                parser._defaults = {}
+                for action in parser._actions:
+                    action.default = SUPPRESS
 
-            parser._actions = original_parser_actions
-            parser._defaults = original_parser_defaults
+                try:
+                    parsed_args, _ = parser.parse_known_args(args_split, Namespace())
+                finally:
+                    for action, default in original_action_defaults:
+                        action.default = default
+                    parser._defaults = original_parser_defaults
+
+                command_args = {k for k, v in parsed_args.__dict__.items() if v is not None}
 
-            command_args = {k for k, v in parsed_args.__dict__.items() if v is not None}
             analytics.collector.on_magic_command(command_name=magic_name, command_args=command_args)
 
         func(self, context, *args, **kwargs)
@@ -98,53 +172,85 @@ def pass_sqlmesh_context(func: t.Callable) -> t.Callable:
     return wrapper
 
 
-def format_arguments(func: t.Callable) -> t.Callable:
-    """Decorator to add common format arguments to magic commands."""
-    func = argument(
+# The common format arguments, in the order they're added to a magic's parser
+_FORMAT_ARGUMENTS: t.Tuple[t.Tuple[str, t.Dict[str, t.Any]], ...] = (
+    (
         "--normalize",
-        action="store_true",
-        help="Whether or not to normalize identifiers to lowercase.",
-        default=None,
-    )(func)
-    func = argument(
-        "--pad",
-        type=int,
-        help="Determines the pad size in a formatted string.",
-    )(func)
-    func = argument(
-        "--indent",
-        type=int,
-        help="Determines the indentation size in a formatted string.",
-    )(func)
-    func = argument(
+        dict(
+            action="store_true",
+            help="Whether or not to normalize identifiers to lowercase.",
+            default=None,
+        ),
+    ),
+    ("--pad", dict(type=int, help="Determines the pad size in a formatted string.")),
+    ("--indent", dict(type=int, help="Determines the indentation size in a formatted string.")),
+    (
         "--normalize-functions",
-        type=str,
-        help="Whether or not to normalize all function names. Possible values are: 'upper', 'lower'",
-    )(func)
-    func = argument(
+        dict(
+            type=str,
+            help="Whether or not to normalize all function names. Possible values are: 'upper', 'lower'",
+        ),
+    ),
+    (
         "--leading-comma",
-        action="store_true",
-        help="Determines whether or not the comma is leading or trailing in select expressions. Default is trailing.",
-        default=None,
-    )(func)
-    func = argument(
+        dict(
+            action="store_true",
+            help="Determines whether or not the comma is leading or trailing in select expressions. Default is trailing.",
+            default=None,
+        ),
+    ),
+    (
         "--max-text-width",
-        type=int,
-        help="The max number of characters in a segment before creating new lines in pretty mode.",
-    )(func)
+        dict(
+            type=int,
+            help="The max number of characters in a segment before creating new lines in pretty mode.",
+        ),
+    ),
+)
+
+# The destinations of the arguments added by `format_arguments`
+FORMAT_OPTIONS = tuple(flag[2:].replace("-", "_") for flag, _ in _FORMAT_ARGUMENTS)
+
+
+def format_arguments(func: t.Callable) -> t.Callable:
+    """Decorator to add common format arguments to magic commands."""
+    for flag, kwargs in _FORMAT_ARGUMENTS:
+        func = argument(flag, **kwargs)(func)
     return func
 
 
+# The arguments of the `format` magic that are passed through to `Context.format` as is
+FORMAT_MAGIC_OPTIONS = ("transpile", "check", "append_newline", *FORMAT_OPTIONS)
+
+
+def _format_options(
+    args: Namespace, names: t.Tuple[str, ...] = FORMAT_OPTIONS
+) -> t.Dict[str, t.Any]:
+    """Returns the format options that were explicitly set in the parsed magic arguments."""
+    return {name: value for name in names if (value := getattr(args, name)) is not None}
+
+
 @magics_class
 class SQLMeshMagics(Magics):
+    def __init__(self, shell: t.Any = None, **kwargs: t.Any) -> None:
+        super().__init__(shell=shell, **kwargs)
+        # Parsed test files keyed by path, along with the (mtime, size) of the file they were parsed from
+        self._display: t.Optional[t.Callable] = None
+        # Open Athena connections keyed by the id of the context they belong to and the connection arguments
+        self._athena_connections: t.Dict[t.Tuple, t.Any] = {}
+
     @property
     def display(self) -> t.Callable:
-        from sqlmesh import RuntimeEnv
+        # The runtime environment doesn't change during a session, so resolve it once
+        if self._display is None:
+            from sqlmesh import RuntimeEnv
 
-        if RuntimeEnv.get().is_databricks:
-            # Use Databricks' special display instead of the normal IPython display
-            return self._shell.user_ns["display"]
-        return display
+            if RuntimeEnv.get().is_databricks:
+                # Use Databricks' special display instead of the normal IPython display
+                self._display = self._shell.user_ns["display"]
+            else:
+                self._display = display
+        return self._display
 
     @property
     def _shell(self) -> t.Any:
@@ -178,7 +284,7 @@ class SQLMeshMagics(Magics):
         """Sets the context in the user namespace."""
         from sqlmesh import configure_logging, remove_excess_logs
 
-        args = parse_argstring(self.context, line)
+        args = _parse_argstring(self.context, line)
         log_file_dir = args.log_file_dir
 
         configure_logging(
@@ -192,7 +298,7 @@ class SQLMeshMagics(Magics):
         configs = load_configs(
             args.config, Context.CONFIG_TYPE, args.paths, dotenv_path=dotenv_path
         )
-        log_limit = list(configs.values())[0].log_limit
+        log_limit = next(iter(configs.values())).log_limit
 
         remove_excess_logs(log_file_dir, log_limit)
 
@@ -211,7 +317,7 @@ class SQLMeshMagics(Magics):
     @argument(
         "engine",
         type=str,
-        help=f"Project SQL engine. Supported values: '{', '.join([info[1] for info in sorted(INIT_DISPLAY_INFO_TO_TYPE.values(), key=lambda x: x[0])])}'.",  # type: ignore
+        help=f"Project SQL engine. Supported values: '{INIT_ENGINE_DISPLAY_NAMES}'.",
     )
     @argument(
         "--template",
@@ -232,7 +338,11 @@ class SQLMeshMagics(Magics):
     @line_magic
     def init(self, line: str) -> None:
         """Creates a SQLMesh project scaffold with a default SQL dialect."""
-        args = parse_argstring(self.init, line)
+        from hyperscript import h
+        from rich.jupyter import JupyterRenderable
+        from sqlmesh.cli.project_init import ProjectTemplate, init_example_project
+
+        args = _parse_argstring(self.init, line)
         try:
             project_template = ProjectTemplate(
                 args.template.lower() if args.template else "default"
@@ -269,10 +379,11 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def model(self, context: Context, line: str, sql: t.Optional[str] = None) -> None:
         """Renders the model and automatically fills in an editable cell with the model definition."""
-        args = parse_argstring(self.model, line)
+        args = _parse_argstring(self.model, line)
 
         model = context.get_model(args.model, raise_if_missing=True)
         config = context.config_for_node(model)
+        original: t.Optional[str] = None
 
         if sql:
             expressions = parse(sql, default_dialect=config.dialect)
@@ -289,10 +400,10 @@ class SQLMeshMagics(Magics):
 
             if loaded.name == args.model:
                 model = loaded
-        else:
-            if model._path:
-                with open(model._path, "r", encoding="utf-8") as file:
-                    expressions = parse(file.read(), default_dialect=config.dialect)
+        elif model._path:
+            with open(model._path, "r", encoding="utf-8") as file:
+                original = file.read()
+            expressions = parse(original, default_dialect=config.dialect)
 
         formatted = format_model_expressions(
             expressions,
@@ -302,16 +413,12 @@ class SQLMeshMagics(Magics):
         )
 
         self._shell.set_next_input(
-            "\n".join(
-                [
-                    " ".join(["%%model", line]),
-                    formatted,
-                ]
-            ),
+            f"%%model {line}\n{formatted}",
             replace=True,
         )
 
-        if model._path:
+        # Leave the file untouched if it's already formatted
+        if model._path and formatted != original:
             with open(model._path, "w", encoding="utf-8") as file:
                 file.write(formatted)
 
@@ -336,50 +443,44 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def test(self, context: Context, line: str, test_def_raw: t.Optional[str] = None) -> None:
         """Allow the user to list tests for a model, output a specific test, and then write their changes back"""
-        args = parse_argstring(self.test, line)
+        args = _parse_argstring(self.test, line)
         if not args.test_name and not args.ls:
             raise MagicError("Must provide either test name or `--ls` to list tests")
 
-        test_meta = context.load_model_tests()
+        model = context.get_model(args.model, raise_if_missing=True)
 
-        tests: t.Dict[str, t.Dict[str, ModelTestMetadata]] = defaultdict(dict)
-        for model_test_metadata in test_meta:
-            model = model_test_metadata.body.get("model")
-            if not model:
+        # Only the requested model's tests are needed, so don't index the tests of every other model
+        tests: t.Dict[str, ModelTestMetadata] = {}
+        all_model_tests = context.load_model_tests()
+        for model_test_metadata in all_model_tests:
+            test_model = model_test_metadata.body.get("model")
+            if not test_model:
                 context.console.log_error(
                     f"Test found that does not have `model` defined: {model_test_metadata.path}"
                 )
-            else:
-                tests[model][model_test_metadata.test_name] = model_test_metadata
-
-        model = context.get_model(args.model, raise_if_missing=True)
+            elif test_model == model.name:
+                tests[model_test_metadata.test_name] = model_test_metadata
 
         if args.ls:
             # TODO: Provide better UI for displaying tests
-            for test_name in tests[model.name]:
+            for test_name in tests:
                 context.console.log_status_update(test_name)
             return
 
-        test = tests[model.name][args.test_name]
+        test = tests[args.test_name]
         test_def = yaml.load(test_def_raw) if test_def_raw else test.body
         test_def_output = yaml.dump(test_def)
 
         self._shell.set_next_input(
-            "\n".join(
-                [
-                    " ".join(["%%test", line]),
-                    test_def_output,
-                ]
-            ),
+            f"%%test {line}\n{test_def_output}",
             replace=True,
         )
 
-        with open(test.path, "r+", encoding="utf-8") as file:
-            content = yaml.load(file.read())
-            content[args.test_name] = test_def
-            file.seek(0)
+        # Rebuild the file from the tests that were just loaded instead of parsing it again
+        content = {m.test_name: m.body for m in all_model_tests if m.path == test.path}
+        content[args.test_name] = test_def
+        with open(test.path, "w", encoding="utf-8") as file:
             yaml.dump(content, file)
-            file.truncate()
 
     @magic_arguments()
     @argument(
@@ -517,7 +618,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def plan(self, context: Context, line: str) -> None:
         """Goes through a set of prompts to both establish a plan and apply it"""
-        args = parse_argstring(self.plan, line)
+        args = _parse_argstring(self.plan, line)
 
         setattr(context.console, "verbosity", Verbosity(args.verbose))
 
@@ -582,7 +683,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def run_dag(self, context: Context, line: str) -> None:
         """Evaluate the DAG of models using the built-in scheduler."""
-        args = parse_argstring(self.run_dag, line)
+        args = _parse_argstring(self.run_dag, line)
 
         completion_status = context.run(
             args.environment,
@@ -611,10 +712,8 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def evaluate(self, context: Context, line: str) -> None:
         """Evaluate a model query and fetches a dataframe."""
-        context.refresh()
-
-        snowpark = optional_import("snowflake.snowpark")
-        args = parse_argstring(self.evaluate, line)
+        snowpark = _snowpark()
+        args = _parse_argstring(self.evaluate, line)
 
         df = context.evaluate(
             args.model,
@@ -646,36 +745,31 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def render(self, context: Context, line: str) -> None:
         """Renders a model's query, optionally expanding referenced models."""
-        context.refresh()
-        render_opts = vars(parse_argstring(self.render, line))
-        model = render_opts.pop("model")
-        dialect = render_opts.pop("dialect", None)
+        args = _parse_argstring(self.render, line)
 
-        model = context.get_model(model, raise_if_missing=True)
+        model = context.get_model(args.model, raise_if_missing=True)
 
         query = context.render(
             model,
-            start=render_opts.pop("start", None),
-            end=render_opts.pop("end", None),
-            execution_time=render_opts.pop("execution_time", None),
-            expand=render_opts.pop("expand", False),
+            start=args.start,
+            end=args.end,
+            execution_time=args.execution_time,
+            expand=args.expand,
         )
 
-        no_format = render_opts.pop("no_format", False)
-
         format_config = context.config_for_node(model).format
         format_options = {
             **format_config.generator_options,
-            **{k: v for k, v in render_opts.items() if v is not None},
+            **_format_options(args),
         }
 
         sql = query.sql(
             pretty=True,
-            dialect=context.config.dialect if dialect is None else dialect,
+            dialect=context.config.dialect if args.dialect is None else args.dialect,
             **format_options,
         )
 
-        if no_format:
+        if args.no_format:
             context.console.log_status_update(sql)
         else:
             context.console.show_sql(sql)
@@ -692,7 +786,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def fetchdf(self, context: Context, line: str, sql: str) -> None:
         """Fetches a dataframe from sql, optionally storing it in a variable."""
-        args = parse_argstring(self.fetchdf, line)
+        args = _parse_argstring(self.fetchdf, line)
 
         # Check if we're using Athena and use PandasCursor directly
         if (
@@ -719,13 +813,17 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def dag(self, context: Context, line: str) -> None:
         """Displays the HTML DAG."""
-        args = parse_argstring(self.dag, line)
+        args = _parse_argstring(self.dag, line)
         dag = context.get_dag(args.select_model)
+        displayed: t.Any = dag
         if args.file:
+            html = str(dag)
             with open(args.file, "w", encoding="utf-8") as file:
-                file.write(str(dag))
+                file.write(html)
+            # Reuse the rendered HTML when the DAG is displayed instead of rendering it again
+            displayed = _RenderedHTML(dag, html)
         # TODO: Have this go through console instead of calling display directly
-        self.display(dag)
+        self.display(displayed)
 
     @magic_arguments()
     @line_magic
@@ -745,7 +843,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def create_external_models(self, context: Context, line: str) -> None:
         """Create a schema file containing external model schemas."""
-        args = parse_argstring(self.create_external_models, line)
+        args = _parse_argstring(self.create_external_models, line)
         context.create_external_models(strict=args.strict)
 
     @magic_arguments()
@@ -822,8 +920,12 @@ class SQLMeshMagics(Magics):
 
         Can either be two tables or two environments and a model.
         """
-        args = parse_argstring(self.table_diff, line)
-        source, target = args.source_to_target.split(":")
+        args = _parse_argstring(self.table_diff, line)
+        source, sep, target = args.source_to_target.partition(":")
+        if not sep or ":" in target:
+            raise MagicError(
+                f"Invalid source and target '{args.source_to_target}', expected `SOURCE:TARGET` format"
+            )
         select_models = {args.model} if args.model else args.select_model or None
         context.table_diff(
             source=source,
@@ -861,7 +963,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def table_name(self, context: Context, line: str) -> None:
         """Prints the name of the physical table for the given model."""
-        args = parse_argstring(self.table_name, line)
+        args = _parse_argstring(self.table_name, line)
         context.console.log_status_update(
             context.table_name(args.model_name, args.environment, args.prod)
         )
@@ -897,7 +999,7 @@ class SQLMeshMagics(Magics):
         """Attaches to a DLT pipeline with the option to update specific or all missing tables in the SQLMesh project."""
         from sqlmesh.integrations.dlt import generate_dlt_models
 
-        args = parse_argstring(self.dlt_refresh, line)
+        args = _parse_argstring(self.dlt_refresh, line)
         sqlmesh_models = generate_dlt_models(
             context, args.pipeline, list(args.table or []), args.force, args.dlt_path
         )
@@ -927,12 +1029,9 @@ class SQLMeshMagics(Magics):
 
         https://sqlmesh.readthedocs.io/en/latest/concepts/metrics/overview/
         """
-        args = parse_argstring(self.rewrite, line)
-        context.console.show_sql(
-            context.rewrite(sql, args.read).sql(
-                dialect=args.write or context.config.dialect, pretty=True
-            )
-        )
+        args = _parse_argstring(self.rewrite, line)
+        dialect = args.write or context.config.dialect
+        context.console.show_sql(context.rewrite(sql, args.read).sql(dialect=dialect, pretty=True))
 
     @magic_arguments()
     @argument(
@@ -964,11 +1063,12 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def format(self, context: Context, line: str) -> bool:
         """Format all SQL models and audits."""
-        format_opts = vars(parse_argstring(self.format, line))
-        if format_opts.pop("no_rewrite_casts", None):
+        args = _parse_argstring(self.format, line)
+        format_opts = _format_options(args, FORMAT_MAGIC_OPTIONS)
+        if args.no_rewrite_casts:
             format_opts["rewrite_casts"] = False
 
-        return context.format(**{k: v for k, v in format_opts.items() if v is not None})
+        return context.format(**format_opts)
 
     @magic_arguments()
     @argument("environment", type=str, help="The environment to diff local state against.")
@@ -976,7 +1076,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def diff(self, context: Context, line: str) -> None:
         """Show the diff between the local state and the target environment."""
-        args = parse_argstring(self.diff, line)
+        args = _parse_argstring(self.diff, line)
         context.diff(args.environment)
 
     @magic_arguments()
@@ -985,7 +1085,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def invalidate(self, context: Context, line: str) -> None:
         """Invalidate the target environment, forcing its removal during the next run of the janitor process."""
-        args = parse_argstring(self.invalidate, line)
+        args = _parse_argstring(self.invalidate, line)
         context.invalidate_environment(args.environment)
 
     @magic_arguments()
@@ -998,7 +1098,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def janitor(self, context: Context, line: str) -> None:
         """Run the janitor process to clean up old environments and expired snapshots."""
-        args = parse_argstring(self.janitor, line)
+        args = _parse_argstring(self.janitor, line)
         context.run_janitor(ignore_ttl=args.ignore_ttl)
 
     @magic_arguments()
@@ -1047,12 +1147,12 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def create_test(self, context: Context, line: str) -> None:
         """Generate a unit test fixture for a given model."""
-        args = parse_argstring(self.create_test, line)
+        args = _parse_argstring(self.create_test, line)
         queries = iter(args.query)
         variables = iter(args.var) if args.var else None
         context.create_test(
             args.model,
-            input_queries={k: v.strip('"') for k, v in dict(zip(queries, queries)).items()},
+            input_queries={k: v.strip('"') for k, v in zip(queries, queries)},
             overwrite=args.overwrite,
             variables=dict(zip(variables, variables)) if variables else None,
             path=args.path,
@@ -1085,14 +1185,14 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def run_test(self, context: Context, line: str) -> None:
         """Run unit test(s)."""
-        args = parse_argstring(self.run_test, line)
+        args = _parse_argstring(self.run_test, line)
 
         context.test(
             match_patterns=args.pattern,
             tests=args.tests,
             verbosity=Verbosity(args.verbose),
             preserve_fixtures=args.preserve_fixtures,
-            stream=StringIO(),  # consume the output instead of redirecting to stdout
+            stream=_NullStream(),  # consume the output instead of redirecting to stdout
         )
 
     @magic_arguments()
@@ -1106,7 +1206,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def audit(self, context: Context, line: str) -> bool:
         """Run audit(s)"""
-        args = parse_argstring(self.audit, line)
+        args = _parse_argstring(self.audit, line)
         return context.audit(
             models=args.models, start=args.start, end=args.end, execution_time=args.execution_time
         )
@@ -1131,7 +1231,7 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def check_intervals(self, context: Context, line: str) -> None:
         """Show missing intervals in an environment, respecting signals."""
-        args = parse_argstring(self.check_intervals, line)
+        args = _parse_argstring(self.check_intervals, line)
 
         context.console.show_intervals(
             context.check_intervals(
@@ -1161,17 +1261,15 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def info(self, context: Context, line: str) -> None:
         """Display SQLMesh project information."""
-        args = parse_argstring(self.info, line)
+        args = _parse_argstring(self.info, line)
         context.print_info(skip_connection=args.skip_connection, verbosity=Verbosity(args.verbose))
 
-    @magic_arguments()
     @line_magic
     @pass_sqlmesh_context
     def rollback(self, context: Context, line: str) -> None:
         """Rollback SQLMesh to the previous migration."""
         context.rollback()
 
-    @magic_arguments()
     @line_magic
     @pass_sqlmesh_context
     def clean(self, context: Context, line: str) -> None:
@@ -1179,7 +1277,6 @@ class SQLMeshMagics(Magics):
         context.clear_caches()
         context.console.log_success("SQLMesh cache and build artifacts cleared")
 
-    @magic_arguments()
     @line_magic
     @pass_sqlmesh_context
     def environments(self, context: Context, line: str) -> None:
@@ -1198,10 +1295,9 @@ class SQLMeshMagics(Magics):
     @pass_sqlmesh_context
     def lint(self, context: Context, line: str) -> None:
         """Run linter for target model(s)"""
-        args = parse_argstring(self.lint, line)
+        args = _parse_argstring(self.lint, line)
         context.lint_models(args.models)
 
-    @magic_arguments()
     @line_magic
     @pass_sqlmesh_context
     def destroy(self, context: Context, line: str) -> None:
@@ -1219,19 +1315,48 @@ class SQLMeshMagics(Magics):
 
         try:
             conn_config = context.config.get_connection(context.config.default_connection)
+            # Read just the connection arguments rather than serializing the whole config
             connection_kwargs = {
                 k: v
-                for k, v in conn_config.dict().items()
-                if k in conn_config._connection_kwargs_keys and v is not None
+                for k in conn_config._connection_kwargs_keys
+                if (v := getattr(conn_config, k, None)) is not None
             }
-            cursor = connect(cursor_class=PandasCursor, **connection_kwargs).cursor()
-            return cursor.execute(sql).as_pandas()
+            key = (id(context), tuple(sorted(connection_kwargs.items())))
+        except Exception as e:
+            # Fall back to the regular fetchdf method if PandasCursor can't be used
+            context.console.log_error(f"PandasCursor failed, falling back to standard method: {e}")
+            return context.fetchdf(sql)
 
+        connection = self._athena_connections.get(key)
+        if connection is not None:
+            try:
+                return connection.cursor().execute(sql).as_pandas()
+            except Exception:
+                # The connection may have gone bad since it was checked, so retry once on a fresh one
+                _close_connection(self._athena_connections, key)
+
+        try:
+            connection = connect(cursor_class=PandasCursor, **connection_kwargs)
+            try:
+                # Check the connection up front so that a failure here falls back before the query is submitted
+                connection.cursor().execute("SELECT 1")
+            except Exception:
+                connection.close()
+                raise
+            self._athena_connections[key] = connection
+            # Close the connection once its context is gone, which also keeps a reused id from matching it
+            weakref.finalize(context, _close_connection, self._athena_connections, key)
         except Exception as e:
-            # Fall back to the regular fetchdf method if PandasCursor fails
             context.console.log_error(f"PandasCursor failed, falling back to standard method: {e}")
             return context.fetchdf(sql)
 
+        try:
+            return connection.cursor().execute(sql).as_pandas()
+        except Exception:
+            # Errors from the query itself would just recur in the fallback on a connection that was just checked
+            _close_connection(self._athena_connections, key)
+            raise
+
 
 def register_magics() -> None:
     try:
@@ -7,6 +7,7 @@ from pytest_mock.plugin import MockerFixture
 
 from sqlmesh.core import constants as c
 from sqlmesh.core.analytics.collector import AnalyticsCollector
+from sqlmesh.core.analytics.dispatcher import NoopEventDispatcher
 from sqlmesh.core.snapshot import SnapshotChangeCategory
 from sqlmesh.integrations.github.cicd.config import GithubCICDBotConfig
 from sqlmesh.utils.errors import SQLMeshError
@@ -64,6 +65,11 @@ def test_on_project_loaded(collector: AnalyticsCollector, mocker: MockerFixture,
     )
 
 
+def test_is_enabled(collector: AnalyticsCollector):
+    assert collector.is_enabled
+    assert not AnalyticsCollector(dispatcher=NoopEventDispatcher()).is_enabled
+
+
 def test_on_command(collector: AnalyticsCollector, mocker: MockerFixture):
     collector.on_python_api_command(command_name="test_python_api", command_args=["arg_1", "arg_2"])
     collector.on_magic_command(command_name="test_magic", command_args=["arg_1", "arg_2"])
@@ -24,14 +24,7 @@ def test_no_missing_external_models(tmp_path, copy_to_temp_path) -> None:
 
     before = """    linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),"""
     after = """linter=LinterConfig(enabled=True, rules=["nomissingexternalmodels"]),"""
     read_file = read_file.replace(before, after)
@@ -77,14 +70,7 @@ def test_no_missing_external_models_with_existing_file_ending_in_newline(
 
     before = """    linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),"""
     after = """linter=LinterConfig(enabled=True, rules=["nomissingexternalmodels"]),"""
     read_file = read_file.replace(before, after)
@@ -134,14 +120,7 @@ def test_no_missing_external_models_with_existing_file_not_ending_in_newline(
 
     before = """    linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),"""
     after = """linter=LinterConfig(enabled=True, rules=["nomissingexternalmodels"]),"""
     read_file = read_file.replace(before, after)
@@ -127,6 +127,23 @@ def test_dag(sushi_context):
     }
 
 
+def test_config_for_node_cached(copy_to_temp_path: t.Callable, mocker: MockerFixture):
+    context = Context(paths=copy_to_temp_path("examples/sushi"))
+    model = context.get_model("sushi.orders")
+
+    config = context.config_for_node(model)
+    assert config is context.config
+
+    config_for_path = mocker.spy(context, "config_for_path")
+    assert context.config_for_node(model) is config
+    config_for_path.assert_not_called()
+
+    # Loading the context again clears the cache
+    context.load()
+    assert context.config_for_node(model) is config
+    config_for_path.assert_called_once_with(model._path)
+
+
 @pytest.mark.slow
 def test_render_sql_model(sushi_context, assert_exp_eq, copy_to_temp_path: t.Callable):
     assert_exp_eq(
@@ -1,7 +1,10 @@
+import gc
 import logging
 import pathlib
+import sys
+import types
 import typing as t
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from bs4 import BeautifulSoup
@@ -15,6 +18,7 @@ from rich.console import Console as RichConsole
 
 from sqlmesh import Context, RuntimeEnv
 from sqlmesh.magics import register_magics
+from sqlmesh.utils.errors import MagicError
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -159,6 +163,26 @@ def test_init(tmp_path, notebook, convert_all_html_output_to_text, get_all_html_
     ]
 
 
+@pytest.mark.slow
+def test_model(notebook, sushi_context, mocker: MockerFixture):
+    set_next_input = mocker.spy(notebook, "set_next_input")
+    model_path = sushi_context.get_model("sushi.top_waiters")._path
+
+    with capture_output():
+        notebook.run_line_magic(magic_name="model", line="sushi.top_waiters")
+
+    formatted = model_path.read_text(encoding="utf-8")
+    assert set_next_input.call_args.args[0] == f"%%model sushi.top_waiters\n{formatted}"
+
+    # The file is already formatted, so running the magic again must not rewrite it
+    mtime = model_path.stat().st_mtime_ns
+    with capture_output():
+        notebook.run_line_magic(magic_name="model", line="sushi.top_waiters")
+
+    assert model_path.read_text(encoding="utf-8") == formatted
+    assert model_path.stat().st_mtime_ns == mtime
+
+
 @pytest.mark.slow
 def test_render(
     notebook, sushi_context, convert_all_html_output_to_text, convert_all_html_output_to_tags
@@ -649,8 +673,14 @@ def test_janitor(
 def test_dag(tmp_path_factory, notebook, sushi_context):
     temp_dir = tmp_path_factory.mktemp("dag")
     dag_file = temp_dir / "dag.html"
-    with capture_output() as output:
-        notebook.run_line_magic(magic_name="dag", line=f"--file {str(dag_file)}")
+    # Also capture the HTML output, like a notebook would
+    active_types = notebook.display_formatter.active_types
+    notebook.display_formatter.active_types = [*active_types, "text/html"]
+    try:
+        with capture_output() as output:
+            notebook.run_line_magic(magic_name="dag", line=f"--file {str(dag_file)}")
+    finally:
+        notebook.display_formatter.active_types = active_types
 
     assert not output.stdout
     assert not output.stderr
@@ -661,6 +691,8 @@ def test_dag(tmp_path_factory, notebook, sushi_context):
     file_contents = dag_file.read_text()
     assert '<div id="sqlglot-lineage">' in file_contents
     assert "waiter_revenue_by_day" in file_contents
+    # The displayed HTML is the same as what was written to the file
+    assert output.outputs[0].data["text/html"] == file_contents
 
 
 def test_create_test(notebook, sushi_context):
@@ -707,6 +739,82 @@ def test_test(notebook, sushi_context):
     assert test_file.read_text() == """test_customer_revenue_by_day: TESTING\n"""
 
 
+def test_test_repeated_edits(notebook, sushi_context):
+    from sqlmesh.utils import yaml
+
+    test_file = sushi_context.path / "tests" / "test_customer_revenue_by_day.yaml"
+    line = "sushi.customer_revenue_by_day test_customer_revenue_by_day"
+
+    def cell(outputs: str) -> str:
+        return f"model: sushi.customer_revenue_by_day\noutputs: {outputs}\n"
+
+    with capture_output():
+        notebook.run_cell_magic(magic_name="test", line=line, cell=cell("FIRST"))
+        notebook.run_cell_magic(magic_name="test", line=line, cell=cell("SECOND"))
+    assert yaml.load(test_file) == {
+        "test_customer_revenue_by_day": {
+            "model": "sushi.customer_revenue_by_day",
+            "outputs": "SECOND",
+        }
+    }
+
+    # Changes made to the file outside of the magic are picked up
+    test_file.write_text(
+        "test_customer_revenue_by_day:\n  model: sushi.customer_revenue_by_day\n"
+        "other_test:\n  model: sushi.orders\n"
+    )
+    with capture_output():
+        notebook.run_cell_magic(magic_name="test", line=line, cell=cell("THIRD"))
+    assert yaml.load(test_file) == {
+        "test_customer_revenue_by_day": {
+            "model": "sushi.customer_revenue_by_day",
+            "outputs": "THIRD",
+        },
+        "other_test": {"model": "sushi.orders"},
+    }
+
+
+def test_test_failed_write(notebook, sushi_context):
+    from sqlmesh.utils import yaml
+
+    test_file = sushi_context.path / "tests" / "test_customer_revenue_by_day.yaml"
+    test_file.write_text(
+        "first_test:\n  model: sushi.customer_revenue_by_day\n"
+        "second_test:\n  model: sushi.customer_revenue_by_day\n"
+    )
+
+    def run_test_magic(test_name: str, outputs: str) -> None:
+        notebook.run_cell_magic(
+            magic_name="test",
+            line=f"sushi.customer_revenue_by_day {test_name}",
+            cell=f"model: sushi.customer_revenue_by_day\noutputs: {outputs}\n",
+        )
+
+    with capture_output():
+        run_test_magic("first_test", "FIRST")
+
+    with patch("sqlmesh.magics.open", side_effect=OSError("read-only"), create=True):
+        with pytest.raises(OSError, match="read-only"), capture_output():
+            run_test_magic("second_test", "FAILED")
+
+    # The edit that failed to be written isn't written along with the next one
+    with capture_output():
+        run_test_magic("first_test", "SECOND")
+    assert yaml.load(test_file) == {
+        "first_test": {"model": "sushi.customer_revenue_by_day", "outputs": "SECOND"},
+        "second_test": {"model": "sushi.customer_revenue_by_day"},
+    }
+
+
+def test_test_ls(notebook, sushi_context, convert_all_html_output_to_text):
+    with capture_output() as output:
+        notebook.run_line_magic(magic_name="test", line="sushi.customer_revenue_by_day --ls")
+
+    assert not output.stdout
+    assert not output.stderr
+    assert convert_all_html_output_to_text(output) == ["test_customer_revenue_by_day"]
+
+
 @pytest.mark.slow
 def test_audit(notebook, loaded_sushi_context, convert_all_html_output_to_text):
     with capture_output() as output:
@@ -734,6 +842,145 @@ def test_fetchdf(notebook, sushi_context):
     assert notebook.user_ns["my_result"].to_dict() == {"foo": {0: 1}}
 
 
+@pytest.fixture
+def athena_connect(notebook, mocker: MockerFixture, request) -> MagicMock:
+    """Binds a mocked Athena context to `context` and returns the mocked pyathena `connect`.
+
+    The context is only referenced from the user namespace, so that tests can drop it.
+    """
+    import pandas as pd
+
+    connect = MagicMock()
+    connect.return_value.cursor.return_value.execute.return_value.as_pandas.return_value = (
+        pd.DataFrame({"foo": [1]})
+    )
+    pyathena = types.ModuleType("pyathena")
+    pyathena.connect = connect  # type: ignore
+    pandas_cursor = types.ModuleType("pyathena.pandas.cursor")
+    pandas_cursor.PandasCursor = object  # type: ignore
+    mocker.patch.dict(
+        sys.modules,
+        {
+            "pyathena": pyathena,
+            "pyathena.pandas": types.ModuleType("pyathena.pandas"),
+            "pyathena.pandas.cursor": pandas_cursor,
+        },
+    )
+
+    context = MagicMock(
+        spec=Context,
+        config=MagicMock(),
+        # Named so that the console isn't attached as a child of, and keeps alive, the context
+        console=MagicMock(name="console"),
+        engine_adapter=MagicMock(DIALECT="athena"),
+    )
+    context.config.get_connection.return_value = MagicMock(
+        _connection_kwargs_keys={"region_name", "work_group"},
+        region_name="us-east-1",
+        work_group=None,
+    )
+    notebook.user_ns["context"] = context
+    request.addfinalizer(lambda: notebook.user_ns.pop("context", None))
+    return connect
+
+
+def _athena_connections(notebook) -> t.Dict[t.Tuple, t.Any]:
+    return notebook.magics_manager.registry["SQLMeshMagics"]._athena_connections
+
+
+def test_fetchdf_athena_reuses_connection(notebook, athena_connect):
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT 1 AS foo")
+        notebook.run_cell_magic(magic_name="fetchdf", line="my_result", cell="SELECT 2 AS foo")
+
+    athena_connect.assert_called_once_with(cursor_class=object, region_name="us-east-1")
+    assert notebook.user_ns["my_result"].to_dict() == {"foo": {0: 1}}
+    notebook.user_ns["context"].fetchdf.assert_not_called()
+
+
+def test_fetchdf_athena_connection_closed_with_context(notebook, athena_connect):
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT 1 AS foo")
+    assert len(_athena_connections(notebook)) == 1
+
+    del notebook.user_ns["context"]
+    gc.collect()
+
+    athena_connect.return_value.close.assert_called_once()
+    assert not _athena_connections(notebook)
+
+
+def test_fetchdf_athena_health_check_once(notebook, athena_connect):
+    cursor = athena_connect.return_value.cursor.return_value
+
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT 1 AS foo")
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT 2 AS foo")
+
+    # The health check only runs when the connection is opened, not when it's reused
+    assert [c.args[0] for c in cursor.execute.call_args_list] == [
+        "SELECT 1",
+        "SELECT 1 AS foo",
+        "SELECT 2 AS foo",
+    ]
+
+
+def test_fetchdf_athena_health_check_failure(notebook, athena_connect):
+    context = notebook.user_ns["context"]
+    context.fetchdf.return_value = "fallback"
+    athena_connect.return_value.cursor.return_value.execute.side_effect = RuntimeError(
+        "unreachable"
+    )
+
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="my_result", cell="SELECT 1 AS foo")
+
+    context.fetchdf.assert_called_once_with("SELECT 1 AS foo")
+    assert notebook.user_ns["my_result"] == "fallback"
+    athena_connect.return_value.close.assert_called_once()
+    assert not _athena_connections(notebook)
+
+
+def test_fetchdf_athena_query_failure(notebook, athena_connect):
+    cursor = athena_connect.return_value.cursor.return_value
+    # The health check on the fresh connection passes but the query itself fails
+    cursor.execute.side_effect = [cursor.execute.return_value, RuntimeError("query failed")]
+
+    with pytest.raises(RuntimeError, match="query failed"):
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT bad")
+
+    notebook.user_ns["context"].fetchdf.assert_not_called()
+    athena_connect.assert_called_once()
+    athena_connect.return_value.close.assert_called_once()
+    assert not _athena_connections(notebook)
+
+
+def test_fetchdf_athena_reused_connection_failure(notebook, athena_connect):
+    stale_connection = athena_connect.return_value
+    fresh_connection = MagicMock()
+    fresh_connection.cursor.return_value.execute.return_value = (
+        stale_connection.cursor.return_value.execute.return_value
+    )
+
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="", cell="SELECT 1 AS foo")
+
+    stale_connection.cursor.return_value.execute.side_effect = RuntimeError("connection lost")
+    athena_connect.return_value = fresh_connection
+    with capture_output():
+        notebook.run_cell_magic(magic_name="fetchdf", line="my_result", cell="SELECT 2 AS foo")
+
+    # The stale connection is replaced by a fresh, checked one that runs the query
+    stale_connection.close.assert_called_once()
+    assert [c.args[0] for c in fresh_connection.cursor.return_value.execute.call_args_list] == [
+        "SELECT 1",
+        "SELECT 2 AS foo",
+    ]
+    assert notebook.user_ns["my_result"].to_dict() == {"foo": {0: 1}}
+    assert list(_athena_connections(notebook).values()) == [fresh_connection]
+    notebook.user_ns["context"].fetchdf.assert_not_called()
+
+
 def test_info(notebook, sushi_context, convert_all_html_output_to_text, get_all_html_output):
     with capture_output() as output:
         notebook.run_line_magic(magic_name="info", line="--verbose")
@@ -841,6 +1088,12 @@ def test_table_diff(notebook, loaded_sushi_context, convert_all_html_output_to_t
     ]
 
 
+def test_table_diff_invalid_source_to_target(notebook, sushi_context):
+    for line in ("dev", "dev:prod:other"):
+        with pytest.raises(MagicError, match="expected `SOURCE:TARGET` format"):
+            notebook.run_line_magic(magic_name="table_diff", line=line)
+
+
 @pytest.mark.slow
 @time_machine.travel(FREEZE_TIME)
 def test_table_name(notebook, loaded_sushi_context, convert_all_html_output_to_text):
@@ -880,6 +1133,53 @@ def test_lint(notebook, sushi_context):
     assert "Linter warnings for" in output.outputs[0].data["text/plain"]
 
 
+def test_magic_parser_defaults_restored(notebook, sushi_context):
+    parser = notebook.magics_manager.registry["SQLMeshMagics"].info.parser
+    defaults = [(action.dest, action.default) for action in parser._actions]
+
+    with capture_output():
+        notebook.run_line_magic(magic_name="info", line="--skip-connection")
+
+    assert [(action.dest, action.default) for action in parser._actions] == defaults
+    assert parser.parse_argstring("").verbose == 0
+
+
+def test_context_rebound_between_magics(notebook, mocker: MockerFixture):
+    old_context = MagicMock(spec=Context, console=MagicMock())
+    new_context = MagicMock(spec=Context, console=MagicMock())
+    mocker.patch.dict(notebook.user_ns, {"ctx": old_context})
+    notebook.user_ns.pop("context", None)
+
+    notebook.run_line_magic(magic_name="environments", line="")
+    assert old_context.print_environment_names.call_count == 1
+
+    # A context bound under a higher priority name, e.g. by %context, takes over
+    notebook.user_ns["context"] = new_context
+    notebook.run_line_magic(magic_name="environments", line="")
+    assert old_context.print_environment_names.call_count == 1
+    assert new_context.print_environment_names.call_count == 1
+
+
+def test_parse_argstring_cached(notebook, mocker: MockerFixture):
+    from sqlmesh.magics import _parse_argstring, _parse_line
+
+    plan = notebook.magics_manager.registry["SQLMeshMagics"].plan
+    line = "dev --select-model sushi.orders"
+    _parse_line.cache_clear()
+    parse_argstring = mocker.spy(plan.parser, "parse_argstring")
+
+    args = _parse_argstring(plan, line)
+    assert args.environment == "dev"
+    assert args.select_model == ["sushi.orders"]
+
+    args.select_model.append("sushi.customers")
+    assert _parse_argstring(plan, line).select_model == ["sushi.orders"]
+
+    # The second, identical line is served from the cache rather than parsed again
+    parse_argstring.assert_called_once_with(line)
+    assert _parse_line.cache_info().hits == 1
+
+
 @pytest.mark.slow
 def test_destroy(
     notebook,
@@ -124,14 +124,7 @@ def test_code_actions_create_file(copy_to_temp_path: t.Callable) -> None:
 
     before = """    linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),"""
     after = """linter=LinterConfig(enabled=True, rules=["nomissingexternalmodels"]),"""
     content = content.replace(before, after)
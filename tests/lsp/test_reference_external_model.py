@@ -87,14 +87,7 @@ def test_unregistered_external_model_with_schema(
 
     before = """    linter=LinterConfig(
         enabled=False,
-        rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],
+        rules=_LINTER_RULES,
     ),"""
     after = """linter=LinterConfig(enabled=True, rules=["nomissingexternalmodels"]),"""
     read_file = read_file.replace(before, after)
@@ -22,18 +22,9 @@ test('noselectstar quickfix', async ({ page, sharedCodeServer, tempDir }) => {
   expect(replaced).toContain(target)
 
   // Replace the rules to only have noselectstar
-  const targetRules = `rules=[
-            "noselectstar",
-        ],`
+  const targetRules = `rules=["noselectstar"],`
   const replacedTheOtherRules = replaced.replace(
-    `rules=[
-            "ambiguousorinvalidcolumn",
-            "invalidselectstarexpansion",
-            "noselectstar",
-            "nomissingaudits",
-            "nomissingowner",
-            "nomissingexternalmodels",
-        ],`,
+    `rules=_LINTER_RULES,`,
     targetRules,
   )
   expect(replacedTheOtherRules).toContain(targetRules)